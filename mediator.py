@@ -1,7 +1,10 @@
 import os
+import sys
 import glob
+import threading
 import xml.etree.ElementTree as ET
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 from dateutil import parser as dateparser
 
@@ -132,7 +135,7 @@ class TAKParser:
         for path in glob.glob(os.path.join(self.tak_folder, '*.xml')):
             tree = ET.parse(path)
             root = tree.getroot()
-            abstraction_name = root.attrib['name']
+            abstraction_name = sys.intern(root.attrib['name'])
             loinc_code = root.attrib['loinc']
 
             for cond in root.findall('condition'):
@@ -148,7 +151,7 @@ class TAKParser:
                 rule_objs = []
                 for r in cond.findall('rule'):
                     rule_objs.append({
-                        'label': r.attrib['value'],
+                        'label': sys.intern(r.attrib['value']),  # Matches the interned rule table values
                         'min': float(r.attrib['min']) if 'min' in r.attrib else None,
                         'max': float(r.attrib['max']) if 'max' in r.attrib else None
                     })
@@ -178,12 +181,24 @@ class Mediator:
     Attributes:
         parser (TAKParser): Loads TAK rules from XML files.
         tak_rules (list of TAKRule): All loaded rules.
-        db (DataAccess): Database interface for patient and measurement retrieval.
+        db (DataAccess): Database interface for patient and measurement retrieval, one per thread.
     """
     def __init__(self, tak_folder=TAK_FOLDER):
         self.parser = TAKParser(tak_folder)
         self.tak_rules = self.parser.load_all_taks()
-        self.db = DataAccess()
+        self._local = threading.local()
+        self._local.db = DataAccess()
+
+    @property
+    def db(self):
+        """
+        DataAccess instance of the calling thread, created on first use.
+        SQLite connections cannot be shared between threads, so each worker gets its own.
+        """
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = self._local.db = DataAccess()
+        return db
     
 
     def _get_patient_records(self, patient_id, snapshot_date):
@@ -278,6 +293,21 @@ class Mediator:
         return df_merged
 
 
+    def _to_categorical(self, df):
+        """
+        Store the low-cardinality label columns as categoricals for cheaper filtering.
+        'Value' is left as is since raw records keep their numeric measurement values.
+
+        Args:
+            df (pd.DataFrame): Records in the unified output format.
+
+        Returns:
+            pd.DataFrame: The same dataframe with 'Concept Name' and 'Source' as category dtype.
+        """
+        for col in ['Concept Name', 'Source']:
+            df[col] = df[col].astype('category')
+        return df
+
     def run(self, patient_id, snapshot_date=None, relevance=24):
         """
         Run the temporal abstraction engine for a single patient.
@@ -372,8 +402,55 @@ class Mediator:
         ]
 
         final_df = pd.concat([df for df in frames if not df.empty], ignore_index=True)
+        final_df = self._to_categorical(final_df)
 
         return final_df.sort_values(by="StartDateTime").reset_index(drop=True)
+
+    def run_batch(self, patient_ids, snapshot_date=None, relevance=24, max_workers=16):
+        """
+        Run the temporal abstraction engine for several patients and combine the results.
+
+        TAK rules are loaded once for the whole batch, and patients are processed on a thread
+        pool so their DB round-trips overlap. Failures are collected per patient so a single
+        bad record does not abort the batch.
+
+        Args:
+            patient_ids (list): Patient identifiers in the database.
+            snapshot_date (str, optional): View of the DB up to this date (default: today).
+            relevance (int, optional): Number of hours each measure is relevant for (default: 24 hours).
+            max_workers (int, optional): Number of worker threads (default: 16).
+
+        Returns:
+            tuple: (pd.DataFrame of all records in the same format as run(), dict of patient_id -> error message)
+        """
+        snapshot_date = snapshot_date or datetime.today().strftime('%Y-%m-%d')
+
+        patient_ids = [str(patient_id).strip() for patient_id in patient_ids]
+
+        frames = []
+        errors = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                patient_id: executor.submit(self.run, patient_id, snapshot_date, relevance)
+                for patient_id in patient_ids
+            }
+            # Collect in submission order to keep the output deterministic
+            for patient_id, future in futures.items():
+                try:
+                    df = future.result()
+                except Exception as e:
+                    errors[patient_id] = str(e)
+                    continue
+                if not df.empty:
+                    frames.append(df)
+
+        if not frames:
+            return pd.DataFrame(columns=[
+                "PatientId", "LOINC-Code", "Concept Name", "Value", "StartDateTime", "EndDateTime", "Source"
+            ]), errors
+
+        # Concat of categoricals with different categories falls back to object, so re-apply
+        return self._to_categorical(pd.concat(frames, ignore_index=True)), errors
     
 
 
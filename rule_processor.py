@@ -1,7 +1,18 @@
 import json
+import operator
 import os
+import sys
+import types
+import numpy as np
 from backend.backend_config import RULES_FOLDER
 
+# Prefer the faster C parser when available, the stdlib json module otherwise
+try:
+    import orjson
+    _json_loads, _read_mode = orjson.loads, 'rb'
+except ImportError:
+    _json_loads, _read_mode = json.loads, 'r'
+
 class RuleProcessor:
     """
     Rule processor for loading and applying JSON-based clinical rules.
@@ -9,10 +20,15 @@ class RuleProcessor:
 
     def __init__(self, rules_folder=RULES_FOLDER):
         self.rules_folder = rules_folder
+        self._cache = {}  # rule_path -> (mtime, parsed rule data)
 
     def load_rule(self, rule_path):
         """
         Load rule configuration from JSON file.
+        Parsed rules are cached per path and only re-read when the file's
+        modification time changes. Rule keys are converted from the JSON
+        "value1,value2" form into tuples of values; parameter names, values and
+        outcomes are interned.
 
         Args:
             rule_path (str): Path to JSON rule file
@@ -20,11 +36,124 @@ class RuleProcessor:
         Returns:
             dict: Complete rule configuration including parameters and lookup table
         """
-        if os.path.isfile(rule_path):
-            with open(rule_path, 'r') as file:
-                return json.load(file)
-        else:
-            raise FileNotFoundError(f"Rule file not found: {rule_path}")
+        try:
+            mtime = os.path.getmtime(rule_path)
+            cached = self._cache.get(rule_path)
+            if cached is not None and cached[0] == mtime:
+                return cached[1]
+
+            with open(rule_path, _read_mode) as file:
+                rule_data = _json_loads(file.read())
+        except (FileNotFoundError, IsADirectoryError, NotADirectoryError) as e:
+            # Paths that are not regular files report the same error as before
+            raise FileNotFoundError(f"Rule file not found: {rule_path}") from e
+
+        rule_data["input_parameters"] = [sys.intern(param) for param in rule_data["input_parameters"]]
+        rule_data["rules"] = {
+            tuple(sys.intern(part) for part in key.split(",")): sys.intern(outcome)
+            for key, outcome in rule_data["rules"].items()
+        }
+        rule_data["code_maps"], rule_data["table"] = self._build_lookup_table(
+            rule_data["rules"], len(rule_data["input_parameters"]))
+        rule_data["getter"] = self._build_getter(rule_data["input_parameters"])
+
+        # The parsed rule is shared through the cache, so expose the lookup structures read-only
+        rule_data["rules"] = types.MappingProxyType(rule_data["rules"])
+        rule_data["code_maps"] = [types.MappingProxyType(code_map) for code_map in rule_data["code_maps"]]
+        rule_data["table"].flags.writeable = False
+        self._cache[rule_path] = (mtime, rule_data)
+        return rule_data
+
+    @staticmethod
+    def _build_lookup_table(rules, n_params):
+        """
+        Build a dense lookup table over the Cartesian product of the known input values.
+
+        Args:
+            rules (dict): Tuple-keyed rule table, one value per input parameter
+            n_params (int): Number of input parameters of the rule
+
+        Returns:
+            tuple: (list of dicts mapping each parameter's values to integer codes,
+                    np.ndarray of outcomes indexed by those codes, None where no rule exists)
+
+        Raises:
+            ValueError: If a rule key does not have exactly one value per input parameter.
+        """
+        code_maps = [{} for _ in range(n_params)]
+        for key in rules:
+            if len(key) != n_params:
+                raise ValueError(f"Rule key '{','.join(key)}' has {len(key)} values, expected {n_params}")
+            for code_map, value in zip(code_maps, key):
+                code_map.setdefault(value, len(code_map))
+
+        table = np.empty(tuple(len(code_map) for code_map in code_maps), dtype=object)
+        for key, outcome in rules.items():
+            table[tuple(code_map[value] for code_map, value in zip(code_maps, key))] = outcome
+
+        return code_maps, table
+
+    @staticmethod
+    def _build_getter(input_parameters):
+        """
+        Build a callable extracting the input values of a rule, in parameter order, as a tuple.
+
+        Args:
+            input_parameters (list): Parameter names of the rule
+
+        Returns:
+            callable: input_values dict -> tuple of values (raises KeyError on a missing parameter)
+        """
+        getter = operator.itemgetter(*input_parameters)
+        if len(input_parameters) == 1:
+            # itemgetter with a single item returns the bare value instead of a tuple
+            return lambda input_values: (getter(input_values),)
+        return getter
+
+    def lookup(self, rule_data, values):
+        """
+        Look up a rule outcome by input values given in parameter order.
+
+        Args:
+            rule_data (dict): Rule configuration returned by load_rule
+            values (sequence): Input values ordered as rule_data["input_parameters"]
+
+        Returns:
+            str or None: Rule outcome or None if no matching condition found
+        """
+        if len(values) != len(rule_data["code_maps"]):
+            return None  # A partial key would index a slice of the table, not a single outcome
+
+        codes = []
+        for code_map, value in zip(rule_data["code_maps"], values):
+            code = code_map.get(value)
+            if code is None:
+                return None
+            codes.append(code)
+        return rule_data["table"][tuple(codes)]
+
+    def lookup_many(self, rule_data, columns):
+        """
+        Vectorized lookup of rule outcomes for many rows at once.
+
+        Args:
+            rule_data (dict): Rule configuration returned by load_rule
+            columns (list): One sequence of input values per parameter, in parameter order
+
+        Returns:
+            np.ndarray: Object array of rule outcomes, None where no matching condition found
+        """
+        if len(columns) != len(rule_data["code_maps"]):
+            return np.full(len(columns[0]) if columns else 0, None, dtype=object)
+
+        codes = [np.array([code_map.get(value, -1) for value in column], dtype=np.intp)
+                 for code_map, column in zip(rule_data["code_maps"], columns)]
+        n_rows = len(codes[0]) if codes else 0
+
+        outcomes = np.full(n_rows, None, dtype=object)
+        valid = np.logical_and.reduce([c >= 0 for c in codes]) if codes else np.zeros(0, dtype=bool)
+        outcomes[valid] = rule_data["table"][tuple(c[valid] for c in codes)]
+        return outcomes
 
     def apply_rule(self, rule_path, input_values):
         """
@@ -40,10 +169,14 @@ class RuleProcessor:
         rule_data = self.load_rule(rule_path)
 
         # Build lookup key by combining input values in parameter order
-        key = ",".join(str(input_values.get(param, ""))
-                       for param in rule_data["input_parameters"])
+        try:
+            key = rule_data["getter"](input_values)
+        except KeyError:
+            return None  # A missing input can never match a rule
+        if not all(key):
+            return None
 
-        return rule_data["rules"].get(key, None)
+        return self.lookup(rule_data, key)
 
 
 if __name__ == "__main__":
@@ -1,3 +1,5 @@
+import logging
+import numpy as np
 import pandas as pd
 from datetime import datetime
 from backend.dataaccess import DataAccess
@@ -5,6 +7,8 @@ from backend.mediator import Mediator
 from backend.rule_processor import RuleProcessor
 from backend.backend_config import *
 
+logger = logging.getLogger(__name__)
+
 
 class SimpleRuleEngine:
     """
@@ -17,6 +21,14 @@ class SimpleRuleEngine:
         self.db = DataAccess()
         self.mediator = Mediator()
         self.rule_processor = RuleProcessor()
+        self.reload_rules()
+
+    def reload_rules(self):
+        """
+        (Re)load all rule files used by the engine into memory.
+        Call this after editing a rule file to pick up the changes.
+        """
+        self._hema_rule = self.rule_processor.load_rule(HEMATOLOGICAL_RULES)
 
     def get_hematological_state(self, hemoglobin_state, wbc_level):
         """
@@ -32,13 +44,8 @@ class SimpleRuleEngine:
         if not hemoglobin_state or not wbc_level:
             return None
 
-        # Prepare input for rule processor
-        input_values = {
-            "hemoglobin_state": hemoglobin_state,
-            "wbc_level": wbc_level
-        }
-
-        return self.rule_processor.apply_rule(HEMATOLOGICAL_RULES, input_values)
+        # Lookup directly in the preloaded rule table
+        return self.rule_processor.lookup(self._hema_rule, (hemoglobin_state, wbc_level))
 
     def get_latest_abstracted_value(self, df, concept_name, snapshot_time):
         """
@@ -55,27 +62,96 @@ class SimpleRuleEngine:
         if df.empty:
             return None
 
-        # Filter for the specific concept and current time
+        # Filter for the specific concept and current time (Mediator returns parsed datetime columns)
         concept_data = df[
             (df['Concept Name'] == concept_name) &
-            (pd.to_datetime(df['StartDateTime']) <= snapshot_time) &
-            (pd.to_datetime(df['EndDateTime']) >= snapshot_time)
+            (df['StartDateTime'] <= snapshot_time) &
+            (df['EndDateTime'] >= snapshot_time)
             ]
 
         if concept_data.empty:
             return None
 
         # Get the most recent one by StartDateTime
-        latest = concept_data.loc[concept_data['StartDateTime'].idxmax()]
-        return latest['Value']
+        pos = concept_data['StartDateTime'].values.argmax()
+        return concept_data['Value'].values[pos]
+
+    def get_latest_values(self, df, concept_names, snapshot_time):
+        """
+        Extract the latest abstracted value of several concepts in a single pass.
+
+        Args:
+            df (pd.DataFrame): Abstracted measurements dataframe
+            concept_names (list): Names of the concepts to extract
+            snapshot_time (datetime): Current time for filtering
 
-    def analyze_patient_hematological_state(self, patient_id, snapshot_date=None):
+        Returns:
+            dict: concept name -> latest value (None if not found)
+        """
+        latest_values = dict.fromkeys(concept_names)
+        if df.empty:
+            return latest_values
+
+        # Filter for the requested concepts and current time in a single mask
+        window = df[
+            df['Concept Name'].isin(concept_names) &
+            (df['StartDateTime'] <= snapshot_time) &
+            (df['EndDateTime'] >= snapshot_time)
+            ]
+
+        if window.empty:
+            return latest_values
+
+        # Get the most recent one per concept by StartDateTime, on the raw arrays
+        names = window['Concept Name'].values
+        start_times = window['StartDateTime'].values
+        values = window['Value'].values
+        for concept_name in concept_names:
+            positions = np.flatnonzero(names == concept_name)
+            if positions.size:
+                latest_values[concept_name] = values[positions[start_times[positions].argmax()]]
+        return latest_values
+
+    def get_latest_values_per_patient(self, df, concept_names, snapshot_time):
+        """
+        Extract the latest abstracted value of each concept for every patient in the dataframe.
+
+        Args:
+            df (pd.DataFrame): Abstracted measurements dataframe of one or more patients
+            concept_names (list): Names of the concepts to extract
+            snapshot_time (datetime): Current time for filtering
+
+        Returns:
+            pd.DataFrame: Indexed by PatientId with one column per concept (None where not found)
+        """
+        # Filter for the requested concepts and current time in a single mask
+        window = df[
+            df['Concept Name'].isin(concept_names) &
+            (df['StartDateTime'] <= snapshot_time) &
+            (df['EndDateTime'] >= snapshot_time)
+            ]
+
+        if window.empty:
+            return pd.DataFrame(columns=concept_names, dtype=object)
+
+        # Get the most recent one per patient and concept by StartDateTime
+        idx = window.groupby(['PatientId', 'Concept Name'], observed=True)['StartDateTime'].idxmax()
+        latest = window.loc[idx].pivot(index='PatientId', columns='Concept Name', values='Value')
+        latest.columns = latest.columns.astype(str)  # Drop the category dtype before reindexing
+        latest = latest.reindex(columns=concept_names).astype(object)
+        latest.index = latest.index.astype(str)
+        return latest.where(latest.notna(), None)
+
+    def analyze_patient_hematological_state(self, patient_id, snapshot_date=None, include_abstracted=True):
         """
         Analyze patient's hematological state using the 2:1 AND rule.
 
         Args:
             patient_id (str): Patient identifier
-            snapshot_date (str, optional): Snapshot date for analysis
+            snapshot_date (str or datetime, optional): Snapshot date for analysis. Callers analyzing many
+                patients can pass an already parsed pd.Timestamp to skip re-parsing it per patient.
+            include_abstracted (bool, optional): Attach the abstracted dataframe to the result (default: True).
+                Set to False when collecting results for many patients to avoid keeping every dataframe alive.
 
         Returns:
             dict: Analysis results with individual states and compound hematological state
@@ -83,11 +159,12 @@ class SimpleRuleEngine:
         patient_id = str(patient_id).strip()
         snapshot_date = snapshot_date or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 
-        # Convert to datetime for filtering
+        # Convert to datetime for filtering, and keep a string form for the DB queries
         if isinstance(snapshot_date, str):
             snapshot_time = pd.to_datetime(snapshot_date)
         else:
             snapshot_time = snapshot_date
+            snapshot_date = snapshot_time.strftime('%Y-%m-%d %H:%M:%S')
 
         # Step 1: Get abstracted data from existing Mediator
         abstracted_df = self.mediator.run(patient_id, snapshot_date)  # to change
@@ -103,66 +180,98 @@ class SimpleRuleEngine:
             }
 
         # Step 2: Extract latest abstracted values
-        hemoglobin_state = self.get_latest_abstracted_value(abstracted_df, "Hemoglobin_Level", snapshot_time)
-        wbc_level = self.get_latest_abstracted_value(abstracted_df, "WBC_Level", snapshot_time)
+        latest_values = self.get_latest_values(abstracted_df, ["Hemoglobin_Level", "WBC_Level"], snapshot_time)
+        hemoglobin_state = latest_values["Hemoglobin_Level"]
+        wbc_level = latest_values["WBC_Level"]
 
         # Step 3: Apply 2:1 AND rule using JSON rules
         hematological_state = self.get_hematological_state(hemoglobin_state, wbc_level)
 
-        return {
+        analysis = {
             'patient_id': patient_id,
             'snapshot_date': snapshot_date,
             'individual_states': {
                 'hemoglobin_state': hemoglobin_state,
                 'wbc_level': wbc_level
             },
-            'hematological_state': hematological_state,
-            'abstracted_data': abstracted_df
+            'hematological_state': hematological_state
         }
+        if include_abstracted:
+            analysis['abstracted_data'] = abstracted_df
+        return analysis
 
     def analyze_all_patients_hematological_state(self, snapshot_date=None):
         """
-        Analyze hematological state for all patients using existing single-patient function.
+        Analyze hematological state for all patients in a single batch.
 
         Args:
-            snapshot_date (str, optional): Snapshot date for analysis
+            snapshot_date (str or datetime, optional): Snapshot date for analysis
 
         Returns:
             list: List of analyses for all patients
         """
-        from backend_config import GET_ALL_PATIENTS_QUERY
-        import os
-
-        print("Absolute path:", os.path.abspath(GET_ALL_PATIENTS_QUERY))
-        print("Exists?", os.path.isfile(GET_ALL_PATIENTS_QUERY))
-
-        print(f"GET_ALL_PATIENTS_QUERY = {GET_ALL_PATIENTS_QUERY}")
-        print("Is file:", os.path.isfile(GET_ALL_PATIENTS_QUERY))
-        print("Path:", GET_ALL_PATIENTS_QUERY)
-        with open(GET_ALL_PATIENTS_QUERY, 'r', encoding='utf-8') as f:
-            print("SQL content:\n", f.read())
+        logger.debug("Using query: %s", GET_ALL_PATIENTS_QUERY)
         # Use existing fetch_records with the query file
         all_patients = self.db.fetch_records(GET_ALL_PATIENTS_QUERY, ())
 
         if not all_patients:
             return []
 
+        # Parse the snapshot once for the whole batch, and keep a string form for the DB queries
+        snapshot_time = pd.to_datetime(snapshot_date or datetime.now())
+        snapshot_date = snapshot_time.strftime('%Y-%m-%d %H:%M:%S')
+        patients = [(str(patient_id).strip(), first_name, last_name)
+                    for patient_id, first_name, last_name, _ in all_patients]  # Ignore sex with _
+
+        # Step 1: Get abstracted data for all patients in one batch
+        abstracted_df, errors = self.mediator.run_batch(
+            [patient_id for patient_id, _, _ in patients], snapshot_date)
+
+        # Step 2: Extract latest abstracted values for every patient in one pass
+        concept_names = ["Hemoglobin_Level", "WBC_Level"]
+        latest = self.get_latest_values_per_patient(abstracted_df, concept_names, snapshot_time)
+
+        # Step 3: Apply 2:1 AND rule on all patients at once
+        outcomes = self.rule_processor.lookup_many(
+            self._hema_rule, [latest["Hemoglobin_Level"], latest["WBC_Level"]])
+        # Keep object dtype, otherwise pandas may infer str and turn the None outcomes into NaN
+        latest['hematological_state'] = pd.Series(outcomes, index=latest.index, dtype=object)
+        states = latest.to_dict('index')
+        abstracted_ids = set(abstracted_df['PatientId'].astype(str))
+
         results = []
-        for patient_id, first_name, last_name, _ in all_patients:  # Ignore sex with _
-            try:
-                # Call existing single patient function - no changes needed
-                analysis = self.analyze_patient_hematological_state(patient_id, snapshot_date)
-                # Enhance with patient info from the query
-                analysis['first_name'] = first_name
-                analysis['last_name'] = last_name
-                results.append(analysis)
-            except Exception as e:
+        for patient_id, first_name, last_name in patients:
+            if patient_id in errors:
                 # Handle individual patient errors gracefully
                 results.append({
                     'patient_id': patient_id,
                     'first_name': first_name,
                     'last_name': last_name,
-                    'error': str(e)
+                    'error': errors[patient_id]
+                })
+            elif patient_id not in abstracted_ids:
+                results.append({
+                    'patient_id': patient_id,
+                    'first_name': first_name,
+                    'last_name': last_name,
+                    'snapshot_date': snapshot_date,
+                    'hemoglobin_state': None,
+                    'wbc_level': None,
+                    'hematological_state': None,
+                    'error': 'No abstracted data available for this patient'
+                })
+            else:
+                state = states.get(patient_id, {})
+                results.append({
+                    'patient_id': patient_id,
+                    'first_name': first_name,
+                    'last_name': last_name,
+                    'snapshot_date': snapshot_date,
+                    'individual_states': {
+                        'hemoglobin_state': state.get("Hemoglobin_Level"),
+                        'wbc_level': state.get("WBC_Level")
+                    },
+                    'hematological_state': state.get('hematological_state')
                 })
 
         return results